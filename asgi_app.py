@@ -0,0 +1,201 @@
+# Async (ASGI) HTTP front-end za web_client
+# - /video i /metrics se služe direktno iz event loop-a (async generator po gledaocu)
+# - sve ostale rute (/, /settings, /control, /health, /shutdown) idu u postojeću Flask aplikaciju
+# - pokretanje: python web_client.py --async  (zahtijeva: pip install uvicorn asgiref)
+
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+MJPEG_BOUNDARY = b"frame"
+
+# Koliko često broadcaster provjerava da li je stigao novi frame
+POLL_INTERVAL_S = 0.005
+# Gledaoci se bude i bez novog frame-a (da se primijeti prekinuta konekcija)
+HEARTBEAT_S = 1.0
+# Najduže čekanje otvorenih konekcija pri gašenju (SIGTERM iz run_all.py, Ctrl+C)
+SHUTDOWN_TIMEOUT_S = 2
+
+
+class FrameBroadcaster:
+    """
+    Jedan task po event loop-u prati zadnji frame i budi sve gledaoce.
+    Gledaoci čekaju na zajednički asyncio.Event, pa trošak ne raste sa brojem konekcija.
+    Multipart dio (boundary + header + JPEG) se gradi jednom po frame-u i dijeli među gledaocima.
+    """
+
+    def __init__(self, get_frame: Callable[[], Tuple[int, Optional[bytes]]]) -> None:
+        self._get_frame = get_frame
+        self._event: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopped = False
+        self._chunk_seq = -1
+        self._chunk = b""
+        self.viewers = 0
+
+    def _ensure_started(self) -> None:
+        if self._task is None or self._task.done():
+            self._event = asyncio.Event()
+            self._loop = asyncio.get_running_loop()
+            self._task = self._loop.create_task(self._run())
+
+    def stop(self) -> None:
+        #Završava sve /video stream-ove (gašenje servera); sigurno za poziv iz signal handlera.
+        self._stopped = True
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self) -> None:
+        if self._event is not None:
+            ev, self._event = self._event, asyncio.Event()
+            ev.set()
+
+    async def _run(self) -> None:
+        last_seq = -1
+        last_wake = time.monotonic()
+        while True:
+            await asyncio.sleep(POLL_INTERVAL_S)
+            seq, _frame = self._get_frame()
+            now = time.monotonic()
+            if seq != last_seq or now - last_wake >= HEARTBEAT_S:
+                last_seq = seq
+                last_wake = now
+                self._wake()
+
+    def _current_chunk(self) -> Tuple[int, Optional[bytes]]:
+        #Zadnji frame kao gotov multipart dio; gradi se samo kada se seq promijeni (samo event loop nit).
+        seq, frame = self._get_frame()
+        if frame is None:
+            return seq, None
+        if seq != self._chunk_seq:
+            self._chunk = b"".join((b"--", MJPEG_BOUNDARY, b"\r\nContent-Type: image/jpeg\r\n\r\n", frame, b"\r\n"))
+            self._chunk_seq = seq
+        return seq, self._chunk
+
+    async def frames(self, is_disconnected: Callable[[], bool]) -> AsyncIterator[Tuple[int, bytes]]:
+        #Async generator: vraća (seq, multipart dio) svakog novog frame-a; spori gledaoci preskaču frame-ove.
+        self._ensure_started()
+        sent_seq = -1
+        while not is_disconnected() and not self._stopped:
+            seq, chunk = self._current_chunk()
+            if chunk is not None and seq != sent_seq:
+                sent_seq = seq
+                yield seq, chunk
+                continue
+            await self._event.wait()
+
+
+def create_asgi_app(
+    flask_app: Any,
+    get_frame: Callable[[], Tuple[int, Optional[bytes]]],
+    get_metrics: Callable[[], Dict[str, Any]],
+    on_frame_sent: Optional[Callable[[int], None]] = None,
+):
+    #Gradi ASGI aplikaciju; Flask se poziva preko WSGI adaptera samo za ne-streaming rute.
+    try:
+        from asgiref.sync import ThreadSensitiveContext
+        from asgiref.wsgi import WsgiToAsgi
+    except ImportError as e:
+        raise RuntimeError("Async mod zahtijeva asgiref: pip install asgiref uvicorn") from e
+
+    flask_asgi = WsgiToAsgi(flask_app)
+    broadcaster = FrameBroadcaster(get_frame)
+
+    async def video(scope, receive, send) -> None:
+        disconnected = False
+
+        async def watch_disconnect() -> None:
+            nonlocal disconnected
+            while True:
+                msg = await receive()
+                if msg["type"] == "http.disconnect":
+                    disconnected = True
+                    return
+
+        watcher = asyncio.get_running_loop().create_task(watch_disconnect())
+        broadcaster.viewers += 1
+        try:
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"multipart/x-mixed-replace; boundary=" + MJPEG_BOUNDARY),
+                    (b"cache-control", b"no-cache"),
+                ],
+            })
+            async for seq, chunk in broadcaster.frames(lambda: disconnected):
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                if on_frame_sent is not None:
+                    on_frame_sent(seq)
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        except (OSError, RuntimeError):
+            pass
+        finally:
+            broadcaster.viewers -= 1
+            watcher.cancel()
+
+    async def metrics(scope, receive, send) -> None:
+        body = json.dumps(get_metrics()).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def app(scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            # Nema posebnog startup/shutdown posla; receiver niti pokreće web_client
+            while True:
+                msg = await receive()
+                if msg["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif msg["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+
+        if scope["type"] == "http" and scope.get("method") == "GET":
+            if scope["path"] == "/video":
+                await video(scope, receive, send)
+                return
+            if scope["path"] == "/metrics":
+                await metrics(scope, receive, send)
+                return
+
+        # WSGI adapter je thread-sensitive (sve rute bi čekale na jednoj niti, npr. iza /debug/profile);
+        # ThreadSensitiveContext daje svakom Flask zahtjevu njegovu nit
+        async with ThreadSensitiveContext():
+            await flask_asgi(scope, receive, send)
+
+    app.broadcaster = broadcaster
+    return app
+
+
+def run_asgi(asgi_app, host: str, port: int) -> None:
+    #Pokretanje ugrađenog ASGI servera (uvicorn) u jednom event loop-u.
+    try:
+        import uvicorn
+    except ImportError as e:
+        raise RuntimeError("Async mod zahtijeva uvicorn: pip install uvicorn asgiref") from e
+
+    config = uvicorn.Config(asgi_app, host=host, port=port, log_level="warning", lifespan="on",
+                            timeout_graceful_shutdown=SHUTDOWN_TIMEOUT_S)
+    server = uvicorn.Server(config)
+
+    # uvicorn pri gašenju čeka da se odgovori završe, a /video stream traje dok gledalac ne ode;
+    # zato se stream-ovi završavaju čim stigne SIGTERM/SIGINT
+    broadcaster = getattr(asgi_app, "broadcaster", None)
+    handle_exit = server.handle_exit
+
+    def on_exit(sig, frame) -> None:
+        if broadcaster is not None:
+            broadcaster.stop()
+        handle_exit(sig, frame)
+
+    server.handle_exit = on_exit
+    server.run()
@@ -0,0 +1,70 @@
+# NTP-style procjena RTT-a i razlike satova (server - klijent) preko metrics kanala
+# Klijent šalje ping (t1), server odgovara pong-om sa t2 (prijem) i t3 (slanje), klijent bilježi t4:
+#   rtt    = (t4 - t1) - (t3 - t2)
+#   offset = ((t2 - t1) + (t3 - t4)) / 2
+# Od zadnjih WINDOW uzoraka koristi se onaj sa najmanjim RTT-om (najmanje asimetrije u čekanju).
+
+
+from __future__ import annotations
+
+import json
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+PING_INTERVAL_S = 1.0
+WINDOW = 8
+
+def wall_ms() -> float:
+    return time.time() * 1000.0
+
+def make_pong(ping: Dict[str, Any], t2: float) -> bytes:
+    #Odgovor servera na ping; t3 se uzima neposredno prije slanja.
+    pong = {"type": "pong", "seq": ping.get("seq"), "t1": ping.get("t1"), "t2": t2, "t3": wall_ms()}
+    return json.dumps(pong).encode("utf-8")
+
+
+class ClockSync:
+    """Stanje na strani klijenta: poslani pingovi i filtrirana procjena offset/RTT."""
+
+    def __init__(self) -> None:
+        self._seq = 0
+        self._pending: Dict[int, float] = {}   # seq -> monotonic trenutak slanja
+        self._samples: deque = deque(maxlen=WINDOW)
+        self.offset_ms: float = 0.0
+        self.rtt_ms: Optional[float] = None
+
+    def make_ping(self) -> bytes:
+        self._seq += 1
+        self._pending[self._seq] = time.monotonic()
+        # Izgubljeni pingovi se ne gomilaju
+        if len(self._pending) > WINDOW * 4:
+            for seq in sorted(self._pending)[:-WINDOW]:
+                del self._pending[seq]
+        return json.dumps({"type": "ping", "seq": self._seq, "t1": wall_ms()}).encode("utf-8")
+
+    def handle_pong(self, pong: Dict[str, Any]) -> bool:
+        #Obrada pong-a; vraća True ako je procjena ažurirana.
+        t4 = wall_ms()
+        sent_mono = self._pending.pop(pong.get("seq"), None)
+        try:
+            t1, t2, t3 = float(pong["t1"]), float(pong["t2"]), float(pong["t3"])
+        except (KeyError, TypeError, ValueError):
+            return False
+        if sent_mono is None:
+            return False
+
+        # Trajanje na strani klijenta mjeri se monotonim satom
+        elapsed = (time.monotonic() - sent_mono) * 1000.0
+        rtt = max(0.0, elapsed - (t3 - t2))
+        offset = ((t2 - t1) + (t3 - t4)) / 2.0
+        self._samples.append((rtt, offset))
+
+        best_rtt, best_offset = min(self._samples)
+        self.rtt_ms = best_rtt
+        self.offset_ms = best_offset
+        return True
+
+    def to_local_ms(self, server_ts_ms: float) -> float:
+        #Serverski timestamp prebačen u sat klijenta.
+        return server_ts_ms - self.offset_ms
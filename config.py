@@ -2,8 +2,10 @@
 # Centralizovano učitavanje i snimanje konfiguracije u config.json
 
 import json
+import socket
+import threading
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Tuple
 
 DEFAULT_CONFIG: Dict[str, Any] = {
     "web_client": {
@@ -12,7 +14,11 @@ DEFAULT_CONFIG: Dict[str, Any] = {
         "metrics_listen_port": 7001,
         "web_host": "0.0.0.0",
         "web_port": 8000,
-        "auto_start_receivers": True
+        "auto_start_receivers": True,
+        "async_http": False,
+        "server_control_ip": "",
+        "multicast_group": "",
+        "multicast_interface": "0.0.0.0"
     },
     "udp_server": {
         "client_ip": "127.0.0.1",
@@ -21,7 +27,22 @@ DEFAULT_CONFIG: Dict[str, Any] = {
         "camera_index": 0,
         "max_udp_payload": 1300,
         "jpeg_quality": 70,
-        "fps_limit": 0
+        "fps_limit": 0,
+        "multicast_group": "",
+        "multicast_ttl": 1,
+        "multicast_interface": "0.0.0.0",
+        "destinations": [],
+        "control_port": 7900
+    },
+    "relay": {
+        "listen_ip": "0.0.0.0",
+        "listen_port": 4101,
+        "metrics_listen_port": 7101,
+        "multicast_group": "",
+        "multicast_interface": "0.0.0.0",
+        "destinations": [],
+        "batch_size": 64,
+        "stats_interval_s": 5
     }
 }
 
@@ -33,19 +54,83 @@ def _deep_update(dst: Dict[str, Any], src: Dict[str, Any]) -> Dict[str, Any]:
             dst[k] = v
     return dst
 
+def _copy_tree(v: Any) -> Any:
+    # Kopija dict/list stabla (brže od copy.deepcopy); pozivaoci smiju mijenjati rezultat.
+    if isinstance(v, dict):
+        return {k: _copy_tree(x) for k, x in v.items()}
+    if isinstance(v, list):
+        return [_copy_tree(x) for x in v]
+    return v
+
+# Keš parsiranog config-a: putanja -> ((mtime_ns, size), merged); invalidira se promjenom fajla
+_cache: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+_cache_lock = threading.Lock()
+
 def load_config(path: str = "config.json") -> Dict[str, Any]:
     #Učitavanje config.json, ako ne postoji vrati DEFAULT_CONFIG.
+    #Fajl se ponovo čita i parsira samo ako mu se promijenio mtime/veličina.
     p = Path(path)
-    cfg = json.loads(p.read_text(encoding="utf-8")) if p.exists() else {}
+    key = str(p.resolve())
+    try:
+        st = p.stat()
+        stamp = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        stamp = None
+
+    with _cache_lock:
+        cached = _cache.get(key)
+        if stamp is not None and cached is not None and cached[0] == stamp:
+            return _copy_tree(cached[1])
+
+    cfg = json.loads(p.read_text(encoding="utf-8")) if stamp is not None else {}
 
-    
     merged = json.loads(json.dumps(DEFAULT_CONFIG))
 
     if isinstance(cfg, dict):
         _deep_update(merged, cfg)
 
-    return merged
+    with _cache_lock:
+        if stamp is not None:
+            _cache[key] = (stamp, merged)
+        else:
+            _cache.pop(key, None)
+    return _copy_tree(merged)
+
+def parse_destinations(entries: List[Any], default_ip: str, default_port: int, default_metrics_port: int) -> List[Dict[str, Any]]:
+    # Odredišta iz config.json: {"ip", "port", "metrics_port", "max_kbps"} ili "ip:port[:metrics_port]".
+    result: List[Dict[str, Any]] = []
+    for d in entries or []:
+        if isinstance(d, dict):
+            ip = str(d.get("ip", default_ip))
+            port = int(d.get("port", default_port))
+            mport = int(d.get("metrics_port", default_metrics_port))
+            max_kbps = int(d.get("max_kbps", 0))
+        else:
+            parts = str(d).split(":")
+            ip = parts[0] or default_ip
+            port = int(parts[1]) if len(parts) > 1 and parts[1] else default_port
+            mport = int(parts[2]) if len(parts) > 2 and parts[2] else default_metrics_port
+            max_kbps = 0
+        result.append({"ip": _resolve_ip(ip, d), "port": _check_port(port, d), "metrics_port": _check_port(mport, d),
+                       "max_kbps": max_kbps})
+    return result
+
+def _resolve_ip(ip: str, entry: Any) -> str:
+    # Odredište se provjerava jednom pri pokretanju (greška u IP-u ne smije srušiti slanje kasnije).
+    try:
+        return socket.gethostbyname(ip)
+    except (OSError, UnicodeError) as e:
+        raise ValueError(f"Neispravno odredište {entry!r}: ne mogu razriješiti adresu {ip!r} ({e})") from e
+
+def _check_port(port: int, entry: Any) -> int:
+    if not 0 < port < 65536:
+        raise ValueError(f"Neispravno odredište {entry!r}: port {port} nije u opsegu 1-65535")
+    return port
 
 def save_config(cfg: Dict[str, Any], path: str = "config.json") -> None:
     # Snimanje konfiguracije u config.json.
-    Path(path).write_text(json.dumps(cfg, indent=2, ensure_ascii=False), encoding="utf-8")
+    p = Path(path)
+    p.write_text(json.dumps(cfg, indent=2, ensure_ascii=False), encoding="utf-8")
+    # mtime može imati grubu rezoluciju, pa keš brišemo eksplicitno
+    with _cache_lock:
+        _cache.pop(str(p.resolve()), None)
@@ -0,0 +1,59 @@
+# Kontrolni kanal prema udp_server-u (JSON poruke preko UDP-a)
+# - {"type": "config", "jpeg_quality": 60, "fps_limit": 15, "max_udp_payload": 1300}
+#   server primjenjuje vrijednosti između dva frame-a, bez restarta
+# - {"type": "timers", "enabled": true}  uključuje/isključuje tajmere vrućih putanja
+
+
+from __future__ import annotations
+
+import json
+import socket
+from typing import Any, Dict, Optional
+
+# Postavke koje se mogu mijenjati u radu: ime -> (min, max)
+LIVE_FIELDS: Dict[str, tuple] = {
+    "jpeg_quality": (1, 100),
+    "fps_limit": (0, 240),
+    "max_udp_payload": (200, 65000),
+}
+
+def encode_message(msg: Dict[str, Any]) -> bytes:
+    return json.dumps(msg).encode("utf-8")
+
+def decode_message(data: bytes) -> Optional[Dict[str, Any]]:
+    try:
+        msg = json.loads(data.decode("utf-8", errors="ignore"))
+    except Exception:
+        return None
+    return msg if isinstance(msg, dict) and "type" in msg else None
+
+def apply_live_settings(settings: Dict[str, int], msg: Dict[str, Any]) -> Dict[str, int]:
+    #Primjena "config" poruke na settings; vraća samo vrijednosti koje su se promijenile.
+    changed: Dict[str, int] = {}
+    for name, (lo, hi) in LIVE_FIELDS.items():
+        if name not in msg:
+            continue
+        try:
+            value = max(lo, min(hi, int(msg[name])))
+        except (TypeError, ValueError):
+            continue
+        if settings.get(name) != value:
+            settings[name] = value
+            changed[name] = value
+    return changed
+
+def open_control_socket(ip: str, port: int) -> socket.socket:
+    #Neblokirajući socket; server ga provjerava jednom po frame-u.
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind((ip, port))
+    sock.setblocking(False)
+    return sock
+
+def send_control(host: str, port: int, msg: Dict[str, Any]) -> bool:
+    #Slanje jedne kontrolne poruke (best-effort, UDP).
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.sendto(encode_message(msg), (host, int(port)))
+        return True
+    except OSError:
+        return False
@@ -0,0 +1,113 @@
+# Load test za /video: otvara N istovremenih MJPEG konekcija i mjeri potrošnju web_client procesa
+# - memorija (VmRSS) i CPU vrijeme se čitaju iz /proc/<pid> (Linux)
+# - PID web_client-a se uzima iz --pid ili iz pids.json (run_all.py)
+# Primjer: python loadtest_video.py --viewers 300 --duration 20
+
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional
+
+from process_control import read_pids
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Load test za /video (MJPEG) endpoint.")
+    p.add_argument("--host", default="127.0.0.1", help="Host web_client-a")
+    p.add_argument("--port", type=int, default=8000, help="Web port web_client-a")
+    p.add_argument("--viewers", type=int, default=100, help="Broj istovremenih /video konekcija")
+    p.add_argument("--duration", type=float, default=15.0, help="Trajanje testa u sekundama")
+    p.add_argument("--ramp", type=float, default=2.0, help="Vrijeme otvaranja svih konekcija (s)")
+    p.add_argument("--pid", type=int, default=None, help="PID web_client procesa (default: pids.json)")
+    return p.parse_args()
+
+def read_proc_usage(pid: int) -> Optional[Dict[str, float]]:
+    #RSS u KB i ukupno CPU vrijeme procesa u sekundama (Linux /proc).
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+            rss_kb = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+        with open(f"/proc/{pid}/stat", encoding="utf-8") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        ticks = os.sysconf("SC_CLK_TCK")
+        cpu_s = (int(fields[11]) + int(fields[12])) / ticks  # utime + stime
+        threads = int(fields[17])
+        return {"rss_kb": rss_kb, "cpu_s": cpu_s, "threads": threads}
+    except (OSError, StopIteration, IndexError, ValueError):
+        return None
+
+async def viewer(host: str, port: int, stop_at: float, stats: Dict[str, float]) -> None:
+    #Jedan gledalac: čita MJPEG stream do isteka vremena i broji frame-ove/bajtove.
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        stats["failed"] += 1
+        return
+
+    writer.write(f"GET /video HTTP/1.1\r\nHost: {host}\r\nConnection: keep-alive\r\n\r\n".encode())
+    await writer.drain()
+    stats["open"] += 1
+    t_open = time.monotonic()
+    try:
+        while True:
+            remaining = stop_at - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                chunk = await asyncio.wait_for(reader.read(65536), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            if not chunk:
+                stats["closed_by_server"] += 1
+                break
+            stats["bytes"] += len(chunk)
+            stats["frames"] += chunk.count(b"--frame")
+    finally:
+        stats["open"] -= 1
+        stats["conn_s"] += time.monotonic() - t_open
+        writer.close()
+
+async def run(args) -> None:
+    pid = args.pid or read_pids().get("web_client")
+    stats = {"open": 0, "failed": 0, "closed_by_server": 0, "bytes": 0, "frames": 0, "conn_s": 0.0}
+
+    before = read_proc_usage(int(pid)) if pid else None
+    t0 = time.monotonic()
+    stop_at = t0 + args.ramp + args.duration
+
+    tasks: List[asyncio.Task] = []
+    for i in range(args.viewers):
+        tasks.append(asyncio.create_task(viewer(args.host, args.port, stop_at, stats)))
+        if args.ramp > 0:
+            await asyncio.sleep(args.ramp / max(1, args.viewers))
+
+    # Mjerenje tokom stabilnog dijela testa (sve konekcije otvorene)
+    await asyncio.sleep(1.0)
+    mid_t = time.monotonic()
+    mid = read_proc_usage(int(pid)) if pid else None
+    await asyncio.gather(*tasks)
+    end_t = time.monotonic()
+    end = read_proc_usage(int(pid)) if pid else None
+
+    n = args.viewers
+    print(f"[LOADTEST] viewers={n} neuspjelo={stats['failed']} prekinuto_od_servera={stats['closed_by_server']}")
+    print(f"[LOADTEST] frejmova={stats['frames']} ({stats['frames'] / max(1e-6, stats['conn_s']):.1f} fps po gledaocu), "
+          f"primljeno={stats['bytes'] / 1e6:.1f} MB")
+
+    if before and mid and end:
+        rss_delta = mid["rss_kb"] - before["rss_kb"]
+        cpu_pct = (end["cpu_s"] - mid["cpu_s"]) / max(1e-6, end_t - mid_t) * 100
+        print(f"[LOADTEST] web_client pid={pid}: RSS {before['rss_kb'] / 1024:.1f} -> {mid['rss_kb'] / 1024:.1f} MB, "
+              f"niti {before['threads']} -> {mid['threads']}")
+        print(f"[LOADTEST] po gledaocu: {rss_delta / max(1, n):.1f} KB RAM, {cpu_pct / max(1, n):.3f}% CPU "
+              f"(ukupno {cpu_pct:.1f}% CPU)")
+    else:
+        print("[LOADTEST] Nema podataka o procesu (potreban --pid ili pids.json, samo Linux)")
+
+def main():
+    asyncio.run(run(parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+# Pomoćne funkcije za IP multicast (jedan sender -> više receiver-a)
+# - configure_multicast_sender(): TTL/loopback/interfejs za slanje na grupu
+# - join_multicast_group(): IP_ADD_MEMBERSHIP na receiver socketu
+
+
+from __future__ import annotations
+
+import socket
+import struct
+
+def is_multicast(ip: str) -> bool:
+    #Da li je adresa u 224.0.0.0/4 opsegu.
+    try:
+        first = int(ip.split(".")[0])
+    except (ValueError, IndexError):
+        return False
+    return 224 <= first <= 239
+
+def allow_shared_port(sock: socket.socket) -> None:
+    #Više receiver-a na istom računaru može slušati isti multicast port.
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if hasattr(socket, "SO_REUSEPORT"):
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        except OSError:
+            pass
+
+def configure_multicast_sender(sock: socket.socket, ttl: int = 1, interface_ip: str = "0.0.0.0") -> None:
+    #Podešavanje socketa za slanje na multicast grupu.
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, struct.pack("B", max(0, min(255, int(ttl)))))
+    # Loopback uključen da receiver-i na istom računaru (npr. run_all.py) primaju pakete
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+    if interface_ip and interface_ip != "0.0.0.0":
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(interface_ip))
+
+def join_multicast_group(sock: socket.socket, group: str, interface_ip: str = "0.0.0.0") -> None:
+    #Pridruživanje grupi; baca ValueError za adresu koja nije multicast.
+    if not is_multicast(group):
+        raise ValueError(f"Nije multicast adresa: {group}")
+    mreq = socket.inet_aton(group) + socket.inet_aton(interface_ip or "0.0.0.0")
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
@@ -0,0 +1,108 @@
+# Snimanje sirovih UDP paketa u kompaktan binarni log (za debug i offline replay)
+# Format fajla:
+#   FILE_MAGIC (8 bajta)
+#   zapisi: RECORD_FORMAT (arrival_us, length) + sirovi paket
+
+
+from __future__ import annotations
+
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+FILE_MAGIC = b"UDPCAP01"
+
+# Q I = 12 bajta po zapisu (vrijeme dolaska u mikrosekundama + dužina paketa)
+RECORD_FORMAT = "!QI"
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+
+# Koliko bajtova skupljamo u memoriji prije upisa na disk
+DEFAULT_FLUSH_BYTES = 256 * 1024
+# Najduže vrijeme koje zapis čeka u memoriji (da se pri padu procesa ne izgubi rep snimka)
+DEFAULT_FLUSH_INTERVAL_S = 1.0
+
+
+class PacketCaptureWriter:
+    """
+    Upisuje primljene pakete u binarni log.
+    Zapisi se skupljaju u bytearray i upisuju na disk u većim blokovima,
+    da receiver nit ne radi sistemski poziv za svaki paket.
+    """
+
+    def __init__(self, path: str, flush_bytes: int = DEFAULT_FLUSH_BYTES,
+                 flush_interval_s: float = DEFAULT_FLUSH_INTERVAL_S) -> None:
+        self.path = path
+        self.flush_bytes = int(flush_bytes)
+        self.flush_interval_us = int(flush_interval_s * 1e6)
+        self._last_flush_us = time.time_ns() // 1000
+        self.packets = 0
+        self.bytes = 0
+        self._buf = bytearray()
+        self._lock = threading.Lock()
+        self._f = open(path, "wb", buffering=0)
+        self._f.write(FILE_MAGIC)
+
+    def write(self, packet: bytes, arrival_us: Optional[int] = None) -> None:
+        if arrival_us is None:
+            arrival_us = time.time_ns() // 1000
+        with self._lock:
+            if self._f is None:
+                return
+            self._buf += struct.pack(RECORD_FORMAT, arrival_us, len(packet))
+            self._buf += packet
+            self.packets += 1
+            self.bytes += len(packet)
+            if len(self._buf) >= self.flush_bytes or arrival_us - self._last_flush_us >= self.flush_interval_us:
+                self._flush_locked()
+                self._last_flush_us = arrival_us
+
+    def _flush_locked(self) -> None:
+        if self._buf and self._f is not None:
+            self._f.write(self._buf)
+            self._buf.clear()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_locked()
+            if self._f is not None:
+                self._f.close()
+                self._f = None
+
+    def __enter__(self) -> "PacketCaptureWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def iter_capture(data: bytes) -> Iterator[Tuple[int, bytes]]:
+    """
+    Iterira kroz zapise binarnog loga.
+    Vraća (arrival_us, packet) ili baca ValueError ako fajl nije ispravan.
+    """
+    if data[:len(FILE_MAGIC)] != FILE_MAGIC:
+        raise ValueError("Nije capture fajl (pogrešan magic)")
+
+    view = memoryview(data)
+    off = len(FILE_MAGIC)
+    end = len(data)
+    while off < end:
+        if off + RECORD_SIZE > end:
+            raise ValueError("Capture fajl je odsječen (nepotpun zapis)")
+        arrival_us, length = struct.unpack_from(RECORD_FORMAT, data, off)
+        off += RECORD_SIZE
+        if off + length > end:
+            raise ValueError("Capture fajl je odsječen (nepotpun paket)")
+        yield arrival_us, bytes(view[off:off + length])
+        off += length
+
+
+def load_capture(path: str) -> List[Tuple[int, bytes]]:
+    #Učitavanje cijelog loga u memoriju (jedno čitanje fajla).
+    return list(iter_capture(Path(path).read_bytes()))
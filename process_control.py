@@ -1,6 +1,7 @@
 # Pomoćni modul za run_all.py
-# - pids.json sadrži PID-ove udp_server i web_client
+# - pids.json sadrži PID-ove run_all, udp_server i web_client
 # - terminate_known_processes() šalje SIGTERM na procese
+# - notify_supervisor() javlja run_all.py da je proces spreman (UDP poruka na RUN_ALL_READY_ADDR)
 
 
 from __future__ import annotations
@@ -8,11 +9,17 @@ from __future__ import annotations
 import json
 import os
 import signal
+import socket
+import time
 from pathlib import Path
 from typing import Dict, Any, Optional
 
 PID_FILE = Path("pids.json")
 
+# Env varijable koje run_all.py postavlja procesima koje pokreće
+READY_ADDR_ENV = "RUN_ALL_READY_ADDR"   # "127.0.0.1:port" za poruke spremnosti
+START_TS_ENV = "RUN_ALL_START_TS"       # time.time() kada je run_all pokrenuo (ili restartovao) proces
+
 def write_pids(pids: Dict[str, int]) -> None:
     #Snimanje PID-ova u pids.json
     PID_FILE.write_text(json.dumps(pids, indent=2), encoding="utf-8")
@@ -48,3 +55,23 @@ def terminate_known_processes(skip: Optional[str] = None) -> Dict[str, Any]:
         else:
             result["errors"][name] = pid
     return result
+
+def startup_timestamp() -> float:
+    #Početak mjerenja hladnog starta: kada je run_all pokrenuo ovaj proces, ili sada ako proces radi samostalno.
+    try:
+        return float(os.environ[START_TS_ENV])
+    except (KeyError, ValueError):
+        return time.time()
+
+def notify_supervisor(name: str, event: str, **info: Any) -> None:
+    #Slanje događaja ("ready", "first_frame") run_all.py-u; bez run_all-a ne radi ništa.
+    addr = os.environ.get(READY_ADDR_ENV)
+    if not addr:
+        return
+    host, _, port = addr.rpartition(":")
+    msg = {"name": name, "event": event, "pid": os.getpid(), "t": time.time(), **info}
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.sendto(json.dumps(msg).encode("utf-8"), (host, int(port)))
+    except (OSError, ValueError):
+        pass
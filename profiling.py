@@ -0,0 +1,92 @@
+# Instrumentacija vrućih putanja + sampling profiler
+# - hot_timers: tajmeri po fazama (parse, checksum, reassembly, join, send...), uključuju se u radu
+#   Kad su isključeni, start() vraća 0 i stop() odmah izlazi (samo jedna provjera atributa).
+# - sample_profile(): uzorkovanje stack-ova svih niti procesa, rezultat u "collapsed stacks" formatu
+#   (jedan red po stack-u: "nit;funkcija;funkcija broj", ulaz za flamegraph.pl / speedscope)
+
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict
+
+
+class HotTimers:
+    """Zbirni tajmeri po imenu faze: broj poziva, ukupno i maksimalno vrijeme."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._stats: Dict[str, list] = {}
+        self._since = time.time()
+
+    def start(self) -> int:
+        return time.perf_counter_ns() if self.enabled else 0
+
+    def stop(self, name: str, t0: int) -> None:
+        if not t0:
+            return
+        dt = time.perf_counter_ns() - t0
+        with self._lock:
+            s = self._stats.get(name)
+            if s is None:
+                self._stats[name] = [1, dt, dt]
+            else:
+                s[0] += 1
+                s[1] += dt
+                if dt > s[2]:
+                    s[2] = dt
+
+    def set_enabled(self, enabled: bool) -> None:
+        self.enabled = bool(enabled)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self._since = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {
+                name: {
+                    "count": count,
+                    "total_ms": round(total / 1e6, 3),
+                    "avg_us": round(total / count / 1e3, 2),
+                    "max_us": round(mx / 1e3, 2),
+                }
+                for name, (count, total, mx) in self._stats.items()
+            }
+        return {"enabled": self.enabled, "since_ms": int(self._since * 1000), "stages": stages}
+
+
+hot_timers = HotTimers()
+
+
+def sample_profile(seconds: float, interval_s: float = 0.005) -> str:
+    """
+    Uzorkuje stack-ove svih niti (osim pozivajuće) tokom `seconds` sekundi.
+    Vraća collapsed stacks tekst; bez zavisnosti i bez zaustavljanja procesa.
+    """
+    me = threading.get_ident()
+    counts: Counter = Counter()
+    deadline = time.perf_counter() + max(0.0, seconds)
+
+    while time.perf_counter() < deadline:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            counts[";".join(reversed(stack))] += 1
+        time.sleep(interval_s)
+
+    return "".join(f"{stack} {n}\n" for stack, n in counts.most_common())
@@ -3,6 +3,8 @@
 import struct
 import time
 
+from profiling import hot_timers
+
 # B B B B I H H Q H H = 24 bajta headerea
 HEADER_FORMAT = "!BBBBIHHQHH"
 HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
@@ -93,7 +95,10 @@ def parse_packet(packet: bytes) -> tuple[dict, bytes]:
     if payload_size != len(payload):
         raise ValueError("payload_size ne odgovara dužini payloada")
 
-    if calc_checksum(payload) != checksum:
+    t = hot_timers.start()
+    checksum_ok = calc_checksum(payload) == checksum
+    hot_timers.stop("checksum", t)
+    if not checksum_ok:
         raise ValueError("Neispravan checksum – korumpiran paket")
 
     header = {
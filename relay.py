@@ -0,0 +1,265 @@
+# Stateless UDP relay: prima pakete protokola i prosljeđuje ih dalje bez sklapanja frame-ova
+# - provjerava se samo header (HEADER_FORMAT: verzija + payload_size), bez checksuma
+# - paketi se primaju u grupama (batch) u unaprijed alocirane buffere
+# - server metrike (JSON) se prosljeđuju nepromijenjene na metrics_port odredišta
+# - ping/pong (procjena satova u web_client-u) se prosljeđuje između klijenta i servera
+# - po odredištu se može zadati limit (max_kbps); odluka se donosi po frame-u, pa se odbacuju cijeli frame-ovi
+
+
+from __future__ import annotations
+
+import argparse
+import select
+import signal
+import socket
+import struct
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from protocol import HEADER_FORMAT, HEADER_SIZE, PROTOCOL_VERSION
+from config import load_config, parse_destinations
+from multicast import allow_shared_port, join_multicast_group
+
+_HEADER = struct.Struct(HEADER_FORMAT)
+MAX_DATAGRAM = 65535
+# Koliko zadnjih frame-ova relay pamti odluku limita (za fragmente koji kasne)
+FRAME_DECISIONS_KEPT = 16
+
+def parse_args():
+    p = argparse.ArgumentParser(description="UDP relay (prosljeđivanje paketa protokola bez sklapanja frame-ova).")
+    p.add_argument("--config", default="config.json", help="Putanja do config.json")
+    p.add_argument("--listen-ip", default=None, help="IP na kojem relay sluša (override config)")
+    p.add_argument("--listen-port", type=int, default=None, help="UDP port za video (override config)")
+    p.add_argument("--metrics-listen-port", type=int, default=None, help="UDP port za server metrike (override config)")
+    p.add_argument("--dest", action="append", default=None, metavar="IP:PORT[:METRICS_PORT]",
+                   help="Odredište (može više puta; override config destinations)")
+    return p.parse_args()
+
+
+class TokenBucket:
+    """
+    Limit brzine u bajtovima za cijele frame-ove.
+    Propušten frame se naplaćuje po fragmentu i može bucket odvesti u dug;
+    sljedeći frame se propušta tek kad je dug otplaćen, pa prosjek ostaje na rate_bps.
+    """
+
+    def __init__(self, rate_bps: float, burst_bytes: float) -> None:
+        self.rate = float(rate_bps)
+        self.burst = float(burst_bytes)
+        self.tokens = self.burst
+        self.last = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+    def admit(self) -> bool:
+        return self.tokens >= 0
+
+    def charge(self, n: int) -> None:
+        self.tokens -= n
+
+
+class Destination:
+    def __init__(self, d: Dict[str, Any]) -> None:
+        self.addr = (d["ip"], d["port"])
+        self.metrics_addr = (d["ip"], d["metrics_port"])
+        max_kbps = int(d.get("max_kbps", 0))
+        # Burst od ~100 ms saobraćaja (plus najviše jedan propušteni frame)
+        rate = max_kbps * 1000 / 8
+        self.bucket = TokenBucket(rate, rate * 0.1) if max_kbps > 0 else None
+        # Odluka po frame_id (True = šalje se); čuva se samo nekoliko zadnjih frame-ova
+        self.frames: Dict[int, bool] = {}
+        # Svako odredište ima svoj socket: klijent šalje ping na adresu sa koje mu stižu metrike,
+        # pa relay po socketu zna kojem klijentu pripada pong servera
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4 * 1024 * 1024)
+        self.sock.bind(("0.0.0.0", 0))
+        self.sock.setblocking(False)
+        self.ping_client: Optional[Tuple[str, int]] = None
+        self.forwarded = 0
+        self.dropped_rate = 0
+        self.send_errors = 0
+
+    def frame_allowed(self, fid: int) -> bool:
+        #Odluka se donosi na prvom fragmentu frame-a i važi za sve njegove fragmente.
+        allowed = self.frames.get(fid)
+        if allowed is None:
+            allowed = self.bucket is None or self.bucket.admit()
+            self.frames[fid] = allowed
+            if len(self.frames) > FRAME_DECISIONS_KEPT:
+                del self.frames[next(iter(self.frames))]
+        return allowed
+
+
+def header_frame_id(buf: bytearray, n: int) -> int:
+    #Provjera samo header-a (bez checksuma payloada); vraća frame_id ili -1 za neispravan paket.
+    if n < HEADER_SIZE:
+        return -1
+    fields = _HEADER.unpack_from(buf)
+    if fields[0] != PROTOCOL_VERSION or fields[8] != n - HEADER_SIZE:
+        return -1
+    return fields[4]
+
+
+def print_stats(received: int, forwarded: int, dropped_invalid: int, dests: List[Destination]) -> None:
+    print(f"[RELAY] primljeno={received} proslijeđeno={forwarded} odbačeno(header)={dropped_invalid}")
+    for d in dests:
+        print(f"[RELAY]   {d.addr[0]}:{d.addr[1]} poslano={d.forwarded} "
+              f"odbačeno(limit)={d.dropped_rate} greške={d.send_errors}")
+
+
+def _raise_interrupt(_signum, _frame) -> None:
+    raise KeyboardInterrupt
+
+
+def _open_socket(ip: str, port: int, rc: Dict[str, Any]) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+    group = str(rc.get("multicast_group", "") or "")
+    if group:
+        allow_shared_port(sock)
+    sock.bind((ip, port))
+    if group:
+        join_multicast_group(sock, group, str(rc.get("multicast_interface", "0.0.0.0")))
+    sock.setblocking(False)
+    return sock
+
+
+def main():
+    args = parse_args()
+    cfg = load_config(args.config)
+    rc = cfg.get("relay", {})
+
+    listen_ip = args.listen_ip or str(rc.get("listen_ip", "0.0.0.0"))
+    listen_port = int(args.listen_port if args.listen_port is not None else rc.get("listen_port", 4101))
+    metrics_port = int(args.metrics_listen_port if args.metrics_listen_port is not None else rc.get("metrics_listen_port", 7101))
+    batch_size = max(1, int(rc.get("batch_size", 64)))
+    stats_interval = float(rc.get("stats_interval_s", 5))
+
+    dests_cfg = args.dest if args.dest is not None else rc.get("destinations", [])
+    dests: List[Destination] = [Destination(d) for d in parse_destinations(dests_cfg, "127.0.0.1", 4001, 7001)]
+    if not dests:
+        raise RuntimeError("Relay nema odredišta (relay.destinations u config.json ili --dest)")
+
+    vsock = _open_socket(listen_ip, listen_port, rc)
+    msock = _open_socket(listen_ip, metrics_port, rc)
+
+    # Unaprijed alocirani bufferi za jedan batch (ponovo se koriste u svakom krugu)
+    bufs = [bytearray(MAX_DATAGRAM) for _ in range(batch_size)]
+    views = [memoryview(b) for b in bufs]
+    lens = [0] * batch_size
+    mbuf = bytearray(MAX_DATAGRAM)
+    mview = memoryview(mbuf)
+    # Adresa socketa udp_server-a (izvor metrika); na nju se prosljeđuju pingovi klijenata
+    server_addr: Optional[Tuple[str, int]] = None
+    dest_socks = {d.sock: d for d in dests}
+
+    received = 0
+    forwarded = 0
+    dropped_invalid = 0
+    last_stats_t = time.monotonic()
+
+    print(f"[RELAY] Slušam VIDEO na {listen_ip}:{listen_port}, METRIKE na {listen_ip}:{metrics_port}")
+    for d in dests:
+        limit = f", limit {d.bucket.rate * 8 / 1000:.0f} kbps" if d.bucket else ""
+        print(f"[RELAY] Prosljeđujem na {d.addr[0]}:{d.addr[1]} (metrike :{d.metrics_addr[1]}){limit}")
+
+    # SIGTERM (npr. iz run_all.py) gasi relay kao Ctrl+C, uz ispis statistike
+    signal.signal(signal.SIGTERM, _raise_interrupt)
+
+    try:
+        while True:
+            ready, _, _ = select.select([vsock, msock, *dest_socks], [], [], 1.0)
+
+            if vsock in ready:
+                # Pražnjenje socketa u batch buffere
+                count = 0
+                while count < batch_size:
+                    try:
+                        lens[count] = vsock.recv_into(bufs[count])
+                    except (BlockingIOError, InterruptedError):
+                        break
+                    count += 1
+                received += count
+
+                now = time.monotonic()
+                for d in dests:
+                    if d.bucket is not None:
+                        d.bucket.refill(now)
+
+                for i in range(count):
+                    n = lens[i]
+                    fid = header_frame_id(bufs[i], n)
+                    if fid < 0:
+                        dropped_invalid += 1
+                        continue
+                    pkt = views[i][:n]
+                    sent = False
+                    for d in dests:
+                        if not d.frame_allowed(fid):
+                            d.dropped_rate += 1
+                            continue
+                        try:
+                            d.sock.sendto(pkt, d.addr)
+                        except OSError:
+                            # Frame bez ovog fragmenta se ne može sklopiti, ostatak se ne šalje
+                            d.send_errors += 1
+                            d.frames[fid] = False
+                            continue
+                        d.forwarded += 1
+                        if d.bucket is not None:
+                            d.bucket.charge(n)
+                        sent = True
+                    if sent:
+                        forwarded += 1
+
+            if msock in ready:
+                while True:
+                    try:
+                        n, server_addr = msock.recvfrom_into(mbuf)
+                    except (BlockingIOError, InterruptedError):
+                        break
+                    for d in dests:
+                        try:
+                            d.sock.sendto(mview[:n], d.metrics_addr)
+                        except OSError:
+                            pass
+
+            # Ping od klijenta ide serveru, pong od servera nazad klijentu (isti socket odredišta)
+            for s in ready:
+                d = dest_socks.get(s)
+                if d is None:
+                    continue
+                try:
+                    n, addr = s.recvfrom_into(mbuf)
+                except OSError:
+                    continue
+                if addr == server_addr:
+                    target = d.ping_client
+                else:
+                    d.ping_client = addr
+                    target = server_addr
+                if target is not None:
+                    try:
+                        s.sendto(mview[:n], target)
+                    except OSError:
+                        pass
+
+            now = time.monotonic()
+            if stats_interval > 0 and now - last_stats_t >= stats_interval:
+                last_stats_t = now
+                print_stats(received, forwarded, dropped_invalid, dests)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print_stats(received, forwarded, dropped_invalid, dests)
+        for s in (vsock, msock, *dest_socks):
+            try:
+                s.close()
+            except Exception:
+                pass
+        print("[RELAY] Zaustavljen.")
+
+if __name__ == "__main__":
+    main()
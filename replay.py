@@ -0,0 +1,80 @@
+# Offline replay snimljenih paketa (capture log iz web_client --capture)
+# - target "pipeline": paketi idu direktno u handle_video_packet (bez kamere i mreže)
+# - target "udp": paketi se šalju na UDP port (npr. na pokrenuti web_client)
+# Služi i kao deterministički benchmark za parse_packet + sklapanje frame-ova.
+
+
+from __future__ import annotations
+
+import argparse
+import socket
+import time
+from typing import Callable, List, Tuple
+
+from packet_capture import load_capture
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Replay snimljenih UDP paketa (capture log).")
+    p.add_argument("capture", help="Putanja do capture fajla")
+    p.add_argument("--target", choices=("pipeline", "udp"), default="pipeline",
+                   help="pipeline = direktno u receiver, udp = slanje na UDP port")
+    p.add_argument("--host", default="127.0.0.1", help="Odredišni IP za --target udp")
+    p.add_argument("--port", type=int, default=4001, help="Odredišni port za --target udp")
+    p.add_argument("--speed", type=float, default=1.0,
+                   help="1 = originalni tempo, 2 = duplo brže, 0 = najbrže moguće")
+    p.add_argument("--loop", type=int, default=1, help="Koliko puta ponoviti log")
+    return p.parse_args()
+
+def replay(packets: List[Tuple[int, bytes]], sink: Callable[[bytes], None], speed: float = 1.0) -> float:
+    #Reprodukcija paketa u sink; vraća trajanje u sekundama.
+    t_start = time.perf_counter()
+    if not packets:
+        return 0.0
+
+    first_us = packets[0][0]
+    for arrival_us, pkt in packets:
+        if speed > 0:
+            # Čekanje do originalnog (skaliranog) trenutka dolaska
+            due = (arrival_us - first_us) / 1e6 / speed
+            wait = due - (time.perf_counter() - t_start)
+            if wait > 0:
+                time.sleep(wait)
+        sink(pkt)
+
+    return time.perf_counter() - t_start
+
+def main():
+    args = parse_args()
+    packets = load_capture(args.capture)
+    total_bytes = sum(len(p) for _t, p in packets)
+    print(f"[REPLAY] Učitano {len(packets)} paketa ({total_bytes} bajtova) iz {args.capture}")
+
+    if args.target == "udp":
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        dst = (args.host, args.port)
+
+        def sink(pkt: bytes) -> None:
+            sock.sendto(pkt, dst)
+    else:
+        # Import tek ovdje, da udp replay ne zahtijeva Flask
+        import web_client
+        sink = web_client.handle_video_packet
+
+    elapsed = 0.0
+    for _ in range(max(1, args.loop)):
+        elapsed += replay(packets, sink, args.speed)
+
+    n = len(packets) * max(1, args.loop)
+    b = total_bytes * max(1, args.loop)
+    rate = n / elapsed if elapsed > 0 else 0.0
+    mbps = b * 8 / elapsed / 1e6 if elapsed > 0 else 0.0
+    print(f"[REPLAY] {n} paketa za {elapsed:.3f} s -> {rate:.0f} paketa/s, {mbps:.1f} Mbit/s")
+
+    if args.target == "pipeline":
+        with web_client.metrics_lock:
+            m = dict(web_client.client_metrics)
+        print(f"[REPLAY] Dekodirani frejmovi: {m['frames_decoded']}, "
+              f"procjena izgubljenih: {m['frames_lost_estimated']}")
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,154 @@
-# Pokreće udp_server.py i web_client.py na ISTOM računaru
-# Omogućava gašenje oba procesa preko button-a "Ugasi program"
+# Pokreće udp_server.py i web_client.py na ISTOM računaru i nadgleda ih (supervisor)
+# - procesi se pokreću paralelno i javljaju spremnost preko UDP socketa (bez fiksnih sleep-ova)
+# - proces koji se sruši se ponovo pokreće uz backoff, drugi proces nastavlja raditi
+# - omogućava gašenje svih procesa preko button-a "Ugasi program" (SIGTERM na run_all)
 
 
 from __future__ import annotations
 
+import json
+import os
+import signal
+import socket
 import subprocess
 import sys
 import time
-from typing import Dict
+from typing import Dict, Optional
+
+from process_control import READY_ADDR_ENV, START_TS_ENV, write_pids
+
+WORKERS = ("udp_server", "web_client")
+
+BACKOFF_INITIAL_S = 0.5
+BACKOFF_MAX_S = 10.0
+# Ako je proces radio bar ovoliko, backoff se vraća na početnu vrijednost
+STABLE_RUN_S = 30.0
+# Upozorenje ako se proces ne javi kao spreman
+READY_TIMEOUT_S = 20.0
+
+
+class Worker:
+    def __init__(self, name: str, env: Dict[str, str]) -> None:
+        self.name = name
+        self.env = env
+        self.proc: Optional[subprocess.Popen] = None
+        self.started_at = 0.0
+        self.ready = False
+        self.warned = False
+        self.backoff = BACKOFF_INITIAL_S
+        self.restart_at: Optional[float] = None
+        self.restarts = 0
+
+    def start(self) -> None:
+        # Svaki start (i restart) mjeri hladni start od svog trenutka pokretanja
+        env = dict(self.env)
+        env[START_TS_ENV] = repr(time.time())
+        self.proc = subprocess.Popen([sys.executable, f"{self.name}.py"], env=env)
+        self.started_at = time.monotonic()
+        self.ready = False
+        self.warned = False
+        self.restart_at = None
+
+    def running(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
 
-from process_control import write_pids
 
 def main() -> None:
-    # Start udp_server (kamera -> UDP)
-    udp = subprocess.Popen([sys.executable, "udp_server.py"])
-    time.sleep(0.3)
+    # Socket na koji procesi javljaju spremnost / prvi frame
+    events = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    events.bind(("127.0.0.1", 0))
+    events.settimeout(0.2)
+
+    env = dict(os.environ)
+    env[READY_ADDR_ENV] = "%s:%d" % events.getsockname()
+
+    stopping = False
 
-    # Start web_client UI + UDP receiver
-    web = subprocess.Popen([sys.executable, "web_client.py"])
+    def request_stop(_signum, _frame) -> None:
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, request_stop)
+
+    # Oba procesa se pokreću odmah; web_client ne zavisi od udp_server-a
+    workers = {name: Worker(name, env) for name in WORKERS}
+    for w in workers.values():
+        w.start()
+
+    def save_pids() -> None:
+        # run_all je prvi, da ga /shutdown ugasi prije nego što bi restartovao ostale
+        pids: Dict[str, int] = {"run_all": os.getpid()}
+        pids.update({name: w.proc.pid for name, w in workers.items() if w.proc is not None})
+        write_pids(pids)
 
     # Zapamti PID-ove (da /shutdown zna šta treba ugasiti)
-    pids: Dict[str, int] = {"udp_server": udp.pid, "web_client": web.pid}
-    write_pids(pids)
+    save_pids()
 
     print("[RUN_ALL] Pokrenuto: udp_server i web_client")
     print("Otvorite UI na: http://127.0.0.1:8000")
 
-    # Čekanje dok se jedan proces ne ugasi
     try:
-        while True:
-            if udp.poll() is not None or web.poll() is not None:
-                break
-            time.sleep(0.5)
+        while not stopping:
+            # Događaji od procesa (čekanje ujedno zamjenjuje polling sleep)
+            try:
+                data, _addr = events.recvfrom(4096)
+                msg = json.loads(data.decode("utf-8", errors="ignore"))
+            except socket.timeout:
+                msg = None
+            except (OSError, ValueError):
+                msg = None
+
+            if isinstance(msg, dict):
+                w = workers.get(str(msg.get("name")))
+                # Vrijeme se mjeri od (zadnjeg) pokretanja procesa koji je poslao događaj
+                elapsed_ms = int((time.monotonic() - w.started_at) * 1000) if w is not None else 0
+                if w is not None and msg.get("event") == "ready" and not w.ready:
+                    w.ready = True
+                    print(f"[RUN_ALL] {w.name} spreman ({elapsed_ms} ms od starta)")
+                elif w is not None and msg.get("event") == "first_frame":
+                    print(f"[RUN_ALL] Prvi frame primljen i sklopljen ({elapsed_ms} ms od starta)")
+
+            now = time.monotonic()
+            for w in workers.values():
+                if stopping:
+                    break
+                if w.running():
+                    if not w.ready and not w.warned and now - w.started_at > READY_TIMEOUT_S:
+                        w.warned = True
+                        print(f"[RUN_ALL] {w.name} se nije javio kao spreman nakon {READY_TIMEOUT_S:.0f} s")
+                    continue
+
+                if w.restart_at is None:
+                    # Proces se ugasio: restart uz backoff, drugi proces radi dalje
+                    code = w.proc.returncode if w.proc is not None else None
+                    if now - w.started_at >= STABLE_RUN_S:
+                        w.backoff = BACKOFF_INITIAL_S
+                    w.restart_at = now + w.backoff
+                    print(f"[RUN_ALL] {w.name} ugašen (kod {code}), restart za {w.backoff:.1f} s")
+                    w.backoff = min(BACKOFF_MAX_S, w.backoff * 2)
+                elif now >= w.restart_at:
+                    w.restarts += 1
+                    w.start()
+                    save_pids()
+                    print(f"[RUN_ALL] {w.name} ponovo pokrenut (restart #{w.restarts})")
+    except KeyboardInterrupt:
+        pass
     finally:
-        # Ugasi preostali proces (best-effort)
-        for p in (udp, web):
-            if p.poll() is None:
+        # Ugasi preostale procese (best-effort)
+        for w in workers.values():
+            if w.running():
                 try:
-                    p.terminate()
+                    w.proc.terminate()
                 except Exception:
                     pass
+        for w in workers.values():
+            if w.proc is not None:
+                try:
+                    w.proc.wait(timeout=5)
+                except Exception:
+                    w.proc.kill()
+        events.close()
+        print("[RUN_ALL] Zaustavljeno.")
 
 if __name__ == "__main__":
     main()
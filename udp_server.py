@@ -3,9 +3,16 @@ import cv2
 import socket
 import time
 import json
+import signal
+import threading
 
 from protocol import build_packet
-from config import load_config, save_config
+from config import load_config, save_config, parse_destinations
+from multicast import configure_multicast_sender, is_multicast
+from profiling import hot_timers
+from control import apply_live_settings, decode_message, open_control_socket
+from process_control import notify_supervisor
+from clock_sync import make_pong, wall_ms
 
 def parse_args():
     p = argparse.ArgumentParser(description="UDP video server (kamera -> UDP fragmente + server metrike).")
@@ -15,8 +22,65 @@ def parse_args():
     p.add_argument("--client-metrics-port", type=int, default=None, help="UDP port klijenta za server metrike (override config)")
     p.add_argument("--camera", type=int, default=None, help="Indeks kamere (override config)")
     p.add_argument("--fps", type=int, default=None, help="FPS limit (0 = bez limita)")
+    p.add_argument("--multicast-group", default=None, help="Multicast grupa, npr. 239.1.2.3 (override config)")
+    p.add_argument("--multicast-ttl", type=int, default=None, help="TTL za multicast pakete (override config)")
+    p.add_argument("--dest", action="append", default=None, metavar="IP:PORT[:METRICS_PORT]",
+                   help="Dodatno unicast odredište (može više puta; override config destinations)")
+    p.add_argument("--control-port", type=int, default=None, help="UDP port za kontrolni kanal (0 = isključeno)")
+    p.add_argument("--timers", action="store_true",
+                   help="Uključi tajmere vrućih putanja (u radu: SIGUSR1 uključuje/isključuje)")
     return p.parse_args()
 
+def resolve_destinations(us, args, client_ip, client_port, client_metrics_port):
+    #Lista (video_addr, metrics_addr) na koje se šalje svaki frame.
+    dests = args.dest if args.dest is not None else us.get("destinations", []) or []
+    result = [((d["ip"], d["port"]), (d["ip"], d["metrics_port"]))
+              for d in parse_destinations(dests, client_ip, client_port, client_metrics_port)]
+
+    if not result:
+        d = parse_destinations([{"ip": client_ip}], client_ip, client_port, client_metrics_port)[0]
+        result.append(((d["ip"], d["port"]), (d["ip"], d["metrics_port"])))
+    return result
+
+def poll_control(ctrl, settings):
+    #Obrada svih pristiglih kontrolnih poruka (neblokirajuće, između frame-ova).
+    while True:
+        try:
+            data, addr = ctrl.recvfrom(4096)
+        except OSError:
+            # BlockingIOError = nema više poruka
+            return
+        msg = decode_message(data)
+        if msg is None:
+            continue
+        if msg["type"] == "config":
+            changed = apply_live_settings(settings, msg)
+            if changed:
+                print(f"[UDP SERVER] Nove postavke od {addr[0]}: {changed}")
+        elif msg["type"] == "timers":
+            hot_timers.set_enabled(bool(msg.get("enabled")))
+            print(f"[UDP SERVER] Tajmeri {'uključeni' if hot_timers.enabled else 'isključeni'} ({addr[0]})")
+
+def pong_loop(sock):
+    #Odgovara na ping poruke klijenata (procjena RTT/offset satova); radi u posebnoj niti,
+    #da t2 bude trenutak prijema, a ne kraj obrade frame-a.
+    while True:
+        try:
+            data, addr = sock.recvfrom(4096)
+        except ConnectionResetError:
+            # Windows: ICMP "port unreachable" od ranijeg slanja
+            continue
+        except OSError:
+            return
+        t2 = wall_ms()
+        msg = decode_message(data)
+        if msg is None or msg["type"] != "ping":
+            continue
+        try:
+            sock.sendto(make_pong(msg, t2), addr)
+        except OSError:
+            pass
+
 def main():
     args = parse_args()
     cfg = load_config(args.config)
@@ -27,17 +91,54 @@ def main():
     client_port = int(args.client_port if args.client_port is not None else us.get("client_port", 4001))
     client_metrics_port = int(args.client_metrics_port if args.client_metrics_port is not None else us.get("client_metrics_port", 7001))
     camera_index = int(args.camera if args.camera is not None else us.get("camera_index", 0))
-    max_udp_payload = int(us.get("max_udp_payload", 1300))
-    jpeg_quality = int(us.get("jpeg_quality", 70))
-    fps_limit = int(args.fps if args.fps is not None else us.get("fps_limit", 0))
+    control_port = int(args.control_port if args.control_port is not None else us.get("control_port", 7900))
+
+    # Postavke koje se mogu mijenjati u radu preko kontrolnog kanala
+    settings = {
+        "max_udp_payload": int(us.get("max_udp_payload", 1300)),
+        "jpeg_quality": int(us.get("jpeg_quality", 70)),
+        "fps_limit": int(args.fps if args.fps is not None else us.get("fps_limit", 0)),
+    }
+    multicast_group = str(args.multicast_group if args.multicast_group is not None else us.get("multicast_group", "") or "")
+    multicast_ttl = int(args.multicast_ttl if args.multicast_ttl is not None else us.get("multicast_ttl", 1))
 
-    # Socket za slanje
+    # Socket za slanje; eksplicitno bind-an da bi primao ping poruke sa metrics kanala
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("0.0.0.0", 0))
+    threading.Thread(target=pong_loop, args=(sock,), name="pong", daemon=True).start()
+
+    # Odredišta: multicast grupa ILI lista unicast odredišta (default: client_ip)
+    if multicast_group:
+        if not is_multicast(multicast_group):
+            raise ValueError(f"multicast_group nije multicast adresa: {multicast_group}")
+        configure_multicast_sender(sock, multicast_ttl, str(us.get("multicast_interface", "0.0.0.0")))
+        destinations = [((multicast_group, client_port), (multicast_group, client_metrics_port))]
+    else:
+        destinations = resolve_destinations(us, args, client_ip, client_port, client_metrics_port)
+    video_addrs = [v for v, _m in destinations]
+    send_errors = {addr: 0 for addr in video_addrs}
+    metrics_addrs = [m for _v, m in destinations]
+
+    # Kontrolni kanal (web_client /settings šalje nove postavke)
+    ctrl = None
+    if control_port > 0:
+        try:
+            ctrl = open_control_socket("0.0.0.0", control_port)
+        except OSError as e:
+            # Zauzet port ne smije zaustaviti slanje videa; postavke se tada mijenjaju restartom
+            print(f"[UDP SERVER] Ne mogu bindati kontrolni kanal na UDP port {control_port} -> {e}")
+
+    # Tajmeri vrućih putanja; snapshot ide uz server metrike jednom u sekundi
+    hot_timers.set_enabled(args.timers)
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda *_: hot_timers.set_enabled(not hot_timers.enabled))
+    last_timers_sent_t = 0.0
 
     # Kamera
     cap = cv2.VideoCapture(camera_index)
     if not cap.isOpened():
         raise RuntimeError(f"Ne mogu otvoriti kameru index={camera_index}")
+    notify_supervisor("udp_server", "ready", camera_index=camera_index)
 
     # Metrike servera
     frame_id = 0
@@ -50,46 +151,80 @@ def main():
     server_fps = 0
     server_bitrate_kbps = 0
 
-    print(f"[UDP SERVER] Šaljem VIDEO na {client_ip}:{client_port}")
-    print(f"[UDP SERVER] Šaljem METRIKE na {client_ip}:{client_metrics_port}")
-    print(f"[UDP SERVER] max_udp_payload={max_udp_payload}, jpeg_quality={jpeg_quality}, fps_limit={fps_limit}")
+    for (vip, vport), (mip, mport) in destinations:
+        print(f"[UDP SERVER] Šaljem VIDEO na {vip}:{vport}")
+        print(f"[UDP SERVER] Šaljem METRIKE na {mip}:{mport}")
+    if multicast_group:
+        print(f"[UDP SERVER] Multicast grupa {multicast_group}, ttl={multicast_ttl}")
+    print(f"[UDP SERVER] max_udp_payload={settings['max_udp_payload']}, jpeg_quality={settings['jpeg_quality']}, "
+          f"fps_limit={settings['fps_limit']}")
+    if ctrl is not None:
+        print(f"[UDP SERVER] Kontrolni kanal na UDP portu {control_port}")
 
     while True:
         t0 = time.time()
 
+        if ctrl is not None:
+            poll_control(ctrl, settings)
+
+        t = hot_timers.start()
         ok, frame = cap.read()
+        hot_timers.stop("capture", t)
         if not ok:
             continue
 
         # JPEG encode
-        encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), jpeg_quality]
+        t = hot_timers.start()
+        t_encode = time.perf_counter()
+        encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), settings["jpeg_quality"]]
         ok, buf = cv2.imencode(".jpg", frame, encode_params)
+        hot_timers.stop("encode", t)
         if not ok:
             continue
         jpeg = buf.tobytes()
+        t_packetize = time.perf_counter()
 
         # Fragmentacija
-        payload_max = max(200, max_udp_payload)  # osiguravamo da payload nije premali
+        payload_max = max(200, settings["max_udp_payload"])  # osiguravamo da payload nije premali
         total_frags = (len(jpeg) + payload_max - 1) // payload_max
 
         ts_ms = int(time.time() * 1000)
 
+        # Paketi se grade jednom po frame-u, bez obzira na broj odredišta
+        t = hot_timers.start()
+        packets = []
         for frag_id in range(total_frags):
             start = frag_id * payload_max
             end = min(len(jpeg), (frag_id + 1) * payload_max)
             payload = jpeg[start:end]
 
-            pkt = build_packet(
+            packets.append(build_packet(
                 frame_id=frame_id,
                 fragment_id=frag_id,
                 total_fragments=total_frags,
                 payload=payload,
                 timestamp_ms=ts_ms,
-            )
-            sock.sendto(pkt, (client_ip, client_port))
-            packets_sent += 1
-            bytes_sent += len(pkt)
-            bytes_since_bitrate += len(pkt)
+            ))
+        frame_bytes = sum(len(pkt) for pkt in packets)
+        hot_timers.stop("packetize", t)
+
+        t = hot_timers.start()
+        t_send = time.perf_counter()
+        for addr in video_addrs:
+            try:
+                for pkt in packets:
+                    sock.sendto(pkt, addr)
+            except OSError as e:
+                # Nedostupno odredište ne smije zaustaviti slanje ostalima; ostatak frame-a se preskače
+                send_errors[addr] += 1
+                if send_errors[addr] == 1:
+                    print(f"[UDP SERVER] Greška slanja na {addr[0]}:{addr[1]} -> {e} (nastavljam)")
+                continue
+            packets_sent += len(packets)
+            bytes_sent += frame_bytes
+            bytes_since_bitrate += frame_bytes
+        hot_timers.stop("send", t)
+        t_sent = time.perf_counter()
 
         frame_id += 1
 
@@ -114,14 +249,25 @@ def main():
             "server_bitrate_kbps": int(server_bitrate_kbps),
             "server_bytes_sent": int(bytes_sent),
             "server_packets_sent": int(packets_sent),
+            "server_send_errors": sum(send_errors.values()),
             "timestamp_ms": int(time.time() * 1000),
+            # Faze zadnjeg frame-a (monotoni sat servera)
+            "stage_encode_ms": round((t_packetize - t_encode) * 1000, 2),
+            "stage_packetize_ms": round((t_send - t_packetize) * 1000, 2),
+            "stage_send_ms": round((t_sent - t_send) * 1000, 2),
         }
-        try:
-            sock.sendto(json.dumps(metrics).encode("utf-8"), (client_ip, client_metrics_port))
-        except Exception:
-            pass
+        if now - last_timers_sent_t >= 1.0:
+            metrics["server_timers"] = hot_timers.snapshot()
+            last_timers_sent_t = now
+        data = json.dumps(metrics).encode("utf-8")
+        for addr in metrics_addrs:
+            try:
+                sock.sendto(data, addr)
+            except Exception:
+                pass
 
         # FPS limit
+        fps_limit = settings["fps_limit"]
         if fps_limit and fps_limit > 0:
             target_dt = 1.0 / fps_limit
             dt = time.time() - t0
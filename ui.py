@@ -3,13 +3,19 @@
 
 from __future__ import annotations
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, flash
 from typing import Any, Dict
 
 from config import load_config, save_config
+from profiling import hot_timers
 
 ui_bp = Blueprint("ui", __name__)
 
+def _load_config() -> Dict[str, Any]:
+    # Config procesa (--config i override-i iz komandne linije, ako ih web_client postavi)
+    loader = current_app.config.get("LOAD_CONFIG")
+    return loader() if loader is not None else load_config(current_app.config.get("CONFIG_PATH", "config.json"))
+
 def _as_int(value: str, default: int) -> int:
     try:
         return int(value)
@@ -19,7 +25,8 @@ def _as_int(value: str, default: int) -> int:
 @ui_bp.route("/settings", methods=["GET", "POST"])
 def settings():
     #GET: prikaži formu; POST: snimi config.json.
-    cfg = load_config()
+    cfg = _load_config()
+    config_path = current_app.config.get("CONFIG_PATH", "config.json")
     wc = cfg.get("web_client", {})
     us = cfg.get("udp_server", {})
 
@@ -32,6 +39,8 @@ def settings():
 
         web_host = request.form.get("web_host", wc.get("web_host", "0.0.0.0")).strip()
         web_port = _as_int(request.form.get("web_port", str(wc.get("web_port", 8000))), 8000)
+        wc_multicast_group = request.form.get("wc_multicast_group", wc.get("multicast_group", "")).strip()
+        wc_multicast_interface = request.form.get("wc_multicast_interface", wc.get("multicast_interface", "0.0.0.0")).strip()
 
         cfg["web_client"] = {
             **wc,
@@ -41,6 +50,8 @@ def settings():
             "web_host": web_host,
             "web_port": web_port,
             "auto_start_receivers": auto_start,
+            "multicast_group": wc_multicast_group,
+            "multicast_interface": wc_multicast_interface or "0.0.0.0",
         }
 
         #udp_server postavke 
@@ -51,6 +62,8 @@ def settings():
         max_udp_payload = _as_int(request.form.get("max_udp_payload", str(us.get("max_udp_payload", 1300))), 1300)
         jpeg_quality = _as_int(request.form.get("jpeg_quality", str(us.get("jpeg_quality", 70))), 70)
         fps_limit = _as_int(request.form.get("fps_limit", str(us.get("fps_limit", 0))), 0)
+        us_multicast_group = request.form.get("us_multicast_group", us.get("multicast_group", "")).strip()
+        multicast_ttl = _as_int(request.form.get("multicast_ttl", str(us.get("multicast_ttl", 1))), 1)
 
         cfg["udp_server"] = {
             **us,
@@ -61,20 +74,43 @@ def settings():
             "max_udp_payload": max_udp_payload,
             "jpeg_quality": jpeg_quality,
             "fps_limit": fps_limit,
+            "multicast_group": us_multicast_group,
+            "multicast_ttl": multicast_ttl,
         }
 
-        save_config(cfg)
+        # Vrijednosti zadane u komandnoj liniji se ne upisuju u (možda zajednički) config.json
+        file_wc = load_config(config_path).get("web_client", {})
+        for key in current_app.config.get("WEB_CLIENT_OVERRIDES", {}):
+            if key in file_wc:
+                cfg["web_client"][key] = file_wc[key]
+            else:
+                cfg["web_client"].pop(key, None)
+
+        save_config(cfg, config_path)
 
-        # Ako imamo ReceiverManager u app.config uzimamo nove portove/IP
-        manager = ui_bp._app_ctx_stack.top.app.config.get("RECEIVER_MANAGER")  
+        # Ako imamo ReceiverManager u app.config uzimamo nove portove/IP (override-i iz komandne linije ostaju)
+        manager = current_app.config.get("RECEIVER_MANAGER")
         if manager is not None:
-            manager.apply_config(cfg["web_client"])
+            manager.apply_config(_load_config()["web_client"])
 
-        flash("Postavke su sačuvane.", "success")
+        # Encoder/rate postavke se šalju pokrenutom udp_server-u (primjenjuju se bez restarta)
+        server_control = current_app.config.get("SERVER_CONTROL")
+        sent = server_control is not None and server_control({
+            "type": "config",
+            "jpeg_quality": jpeg_quality,
+            "fps_limit": fps_limit,
+            "max_udp_payload": max_udp_payload,
+        })
+
+        if sent:
+            flash("Postavke su sačuvane i poslane udp_server-u.", "success")
+        else:
+            flash("Postavke su sačuvane.", "success")
         return redirect(url_for("ui.settings"))
 
     us_cmd = _build_udp_server_command(us)
-    return render_template("settings.html", wc=wc, us=us, us_cmd=us_cmd, cfg=cfg)
+    return render_template("settings.html", wc=wc, us=us, us_cmd=us_cmd, cfg=cfg, config_path=config_path,
+                           timers_enabled=hot_timers.enabled)
 
 def _build_udp_server_command(us: Dict[str, Any]) -> str:
     #Generisanje komande za pokretanje udp_server-a.
@@ -89,13 +125,33 @@ def _build_udp_server_command(us: Dict[str, Any]) -> str:
         parts += ["--camera", str(us["camera_index"])]
     if us.get("fps_limit") is not None:
         parts += ["--fps", str(us["fps_limit"])]
+    if us.get("multicast_group"):
+        parts += ["--multicast-group", str(us["multicast_group"])]
+        parts += ["--multicast-ttl", str(us.get("multicast_ttl", 1))]
     return " ".join(parts)
 
+def set_hot_timers(enabled: bool) -> bool:
+    #Uključi/isključi tajmere u ovom procesu i u udp_server-u; vraća True ako je poruka poslana serveru.
+    hot_timers.set_enabled(enabled)
+    server_control = current_app.config.get("SERVER_CONTROL")
+    return bool(server_control is not None and server_control({"type": "timers", "enabled": hot_timers.enabled}))
+
 @ui_bp.route("/control/<action>", methods=["POST"])
 def control(action: str):
     #Start/stop/restart receiver-a u web_client procesu
-    cfg = load_config()
-    manager = ui_bp._app_ctx_stack.top.app.config.get("RECEIVER_MANAGER") 
+    cfg = _load_config()
+
+    # Tajmeri vrućih putanja (ne zavise od receiver manager-a)
+    if action in ("timers_on", "timers_off", "timers_reset"):
+        if action == "timers_reset":
+            hot_timers.reset()
+            flash("Tajmeri su resetovani.", "success")
+        else:
+            set_hot_timers(action == "timers_on")
+            flash("Tajmeri su uključeni." if hot_timers.enabled else "Tajmeri su isključeni.", "success")
+        return redirect(url_for("ui.settings"))
+
+    manager = current_app.config.get("RECEIVER_MANAGER")
     if manager is None:
         flash("Receiver manager nije dostupan.", "error")
         return redirect(url_for("ui.settings"))
@@ -108,6 +164,7 @@ def control(action: str):
         flash("Receiveri su zaustavljeni.", "success")
     elif action == "restart":
         manager.apply_config(cfg.get("web_client", {}))
+        manager.restart()
         flash("Receiveri su restartovani.", "success")
     else:
         flash("Nepoznata akcija.", "error")
@@ -1,16 +1,24 @@
+import argparse
+import select
+import signal
 import socket
 import time
 import threading
 import json
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from typing import Optional, Dict, Any
 
-import numpy as np
 from flask import Flask, Response, jsonify, render_template
 
 from protocol import parse_packet
 from config import load_config
-from ui import ui_bp
+from packet_capture import PacketCaptureWriter
+from multicast import allow_shared_port, join_multicast_group
+from profiling import hot_timers, sample_profile
+from control import send_control
+from process_control import notify_supervisor, startup_timestamp
+from clock_sync import ClockSync, PING_INTERVAL_S
+from ui import ui_bp, set_hot_timers
 
 app = Flask(__name__)
 app.secret_key = "flash_poruke"  # potrebno za flash poruke 
@@ -18,6 +26,9 @@ app.secret_key = "flash_poruke"  # potrebno za flash poruke
 #Globalni bufferi / metrike
 frames_buffer: Dict[int, Dict[int, bytes]] = {}
 latest_jpeg: Optional[bytes] = None
+latest_frame_seq = 0  # povećava se sa svakim novim kompletnim frame-om
+latest_publish_mono = 0.0  # monotoni trenutak objave zadnjeg frame-a
+frame_first_arrival: Dict[int, float] = {}  # frame_id -> monotoni dolazak prvog fragmenta
 
 metrics_lock = threading.Lock()
 
@@ -31,6 +42,16 @@ client_metrics: Dict[str, Any] = {
     "last_delay_ms": 0,
     "avg_delay_ms": 0,
     "last_frame_id": -1,
+    "time_to_first_frame_ms": 0,
+    "sender_restarts": 0,
+    # Latencija: delay je korigovan za razliku satova (clock_offset_ms = server - klijent)
+    "raw_delay_ms": 0,
+    "rtt_ms": None,
+    "clock_offset_ms": None,
+    "one_way_delay_ms": 0,
+    "jitter_ms": 0.0,
+    "stage_reassembly_ms": 0.0,
+    "stage_display_ms": 0.0,
 }
 
 server_metrics: Dict[str, Any] = {
@@ -41,11 +62,28 @@ server_metrics: Dict[str, Any] = {
     "timestamp_ms": 0
 }
 
+# Početak hladnog starta (kada je run_all pokrenuo/restartovao ovaj proces) za time_to_first_frame_ms
+startup_ts = startup_timestamp()
+
 #Računanje FPS-a
 last_frame_time: Optional[float] = None
 fps_samples = []
 delay_samples = []
 expected_next_frame_id: Optional[int] = None
+# Ako frame_id padne ovoliko ispod očekivanog, sender je restartovan (numeriše ponovo od 0)
+SENDER_RESTART_GAP = 30
+
+# Procjena razlike satova (ping/pong na metrics kanalu) i jitter (RFC 3550)
+clock_sync = ClockSync()
+last_transit_ms: Optional[float] = None
+jitter_ms = 0.0
+displayed_seq = 0
+
+# IP adresa sa koje stižu server metrike (koristi se za kontrolni kanal prema udp_server-u)
+server_ip: Optional[str] = None
+
+# Snimanje sirovih paketa (postavlja se sa --capture)
+packet_capture: Optional[PacketCaptureWriter] = None
 
 
 @dataclass
@@ -54,6 +92,8 @@ class WebClientConfig:
     listen_port: int = 4001
     metrics_listen_port: int = 7001
     auto_start_receivers: bool = True
+    multicast_group: str = ""
+    multicast_interface: str = "0.0.0.0"
 
 
 class ReceiverManager:
@@ -66,136 +106,262 @@ class ReceiverManager:
         self._lock = threading.Lock()
 
     def apply_config(self, cfg_dict: Dict[str, Any]) -> None:
-        #Primijenjivanje nove konfiguracije i restartovanje receiver-a
+        #Primjena nove konfiguracije; receiver se rebind-a samo ako mu se promijenio IP/port/grupa
         with self._lock:
+            old = replace(self.cfg)
             self.cfg.listen_ip = str(cfg_dict.get("listen_ip", self.cfg.listen_ip))
             self.cfg.listen_port = int(cfg_dict.get("listen_port", self.cfg.listen_port))
             self.cfg.metrics_listen_port = int(cfg_dict.get("metrics_listen_port", self.cfg.metrics_listen_port))
             self.cfg.auto_start_receivers = bool(cfg_dict.get("auto_start_receivers", self.cfg.auto_start_receivers))
+            self.cfg.multicast_group = str(cfg_dict.get("multicast_group", self.cfg.multicast_group) or "")
+            self.cfg.multicast_interface = str(cfg_dict.get("multicast_interface", self.cfg.multicast_interface) or "0.0.0.0")
+
+            if _alive(self._video_thread) and _video_binding(old) != _video_binding(self.cfg):
+                # Ako je port isti, stari socket mora prvo osloboditi port
+                self._stop_video(wait=old.listen_port == self.cfg.listen_port)
+                self._start_video()
+            if _alive(self._metrics_thread) and _metrics_binding(old) != _metrics_binding(self.cfg):
+                self._stop_metrics(wait=old.metrics_listen_port == self.cfg.metrics_listen_port)
+                self._start_metrics()
+
+    def _start_video(self) -> None:
+        # Svaka nit dobija svoj stop event i kopiju config-a
+        self._video_stop = threading.Event()
+        self._video_thread = threading.Thread(target=udp_video_receiver_loop, args=(replace(self.cfg), self._video_stop),
+                                              name="udp-video-receiver", daemon=True)
+        self._video_thread.start()
+
+    def _start_metrics(self) -> None:
+        self._metrics_stop = threading.Event()
+        self._metrics_thread = threading.Thread(target=udp_metrics_receiver_loop, args=(replace(self.cfg), self._metrics_stop),
+                                                name="udp-metrics-receiver", daemon=True)
+        self._metrics_thread.start()
+
+    def _stop_video(self, wait: bool) -> None:
+        self._video_stop.set()
+        if wait:
+            _join(self._video_thread)
 
-        self.restart()
+    def _stop_metrics(self, wait: bool) -> None:
+        self._metrics_stop.set()
+        if wait:
+            _join(self._metrics_thread)
 
     def start(self) -> None:
         with self._lock:
-            if self._video_thread and self._video_thread.is_alive():
-                return
-            self._video_stop.clear()
-            self._metrics_stop.clear()
-
-            self._video_thread = threading.Thread(target=udp_video_receiver_loop, args=(self.cfg, self._video_stop), daemon=True)
-            self._metrics_thread = threading.Thread(target=udp_metrics_receiver_loop, args=(self.cfg, self._metrics_stop), daemon=True)
-            self._video_thread.start()
-            self._metrics_thread.start()
+            if not _alive(self._video_thread):
+                self._start_video()
+            if not _alive(self._metrics_thread):
+                self._start_metrics()
 
     def stop(self) -> None:
         self._video_stop.set()
         self._metrics_stop.set()
 
     def restart(self) -> None:
-        self.stop()
-        time.sleep(0.2)
-        self.start()
+        with self._lock:
+            self._stop_video(wait=True)
+            self._stop_metrics(wait=True)
+            self._start_video()
+            self._start_metrics()
 
     def is_running(self) -> bool:
-        return bool(self._video_thread and self._video_thread.is_alive())
+        return _alive(self._video_thread)
 
 
-def udp_video_receiver_loop(cfg: WebClientConfig, stop_event: threading.Event):
-    #Primanje video paketa, sklapanje frame-ova i računanje KLIJENTSKIH metrika
-    global latest_jpeg, last_frame_time, expected_next_frame_id
+def _alive(thread: Optional[threading.Thread]) -> bool:
+    return bool(thread and thread.is_alive())
+
+
+def _join(thread: Optional[threading.Thread]) -> None:
+    # Receiver petlje provjeravaju stop event najkasnije nakon socket timeout-a (1 s)
+    if thread is not None and thread is not threading.current_thread():
+        thread.join(timeout=2.0)
+
+
+def _video_binding(cfg: WebClientConfig) -> tuple:
+    return (cfg.listen_ip, cfg.listen_port, cfg.multicast_group, cfg.multicast_interface)
+
 
+def _metrics_binding(cfg: WebClientConfig) -> tuple:
+    return (cfg.listen_ip, cfg.metrics_listen_port, cfg.multicast_group, cfg.multicast_interface)
+
+
+def _bind_receiver_socket(sock: socket.socket, cfg: WebClientConfig, port: int) -> None:
+    #Bind na port; za multicast dijeljeni port + IP_ADD_MEMBERSHIP na grupu
+    if cfg.multicast_group:
+        allow_shared_port(sock)
+    # Socket bind-an na unicast IP ne prima multicast; interfejs za grupu bira multicast_interface
+    sock.bind(("0.0.0.0" if cfg.multicast_group else cfg.listen_ip, port))
+    if cfg.multicast_group:
+        join_multicast_group(sock, cfg.multicast_group, cfg.multicast_interface)
+
+
+def handle_video_packet(packet: bytes) -> None:
+    #Obrada jednog video paketa: parsiranje, sklapanje frame-a i KLIJENTSKE metrike
+    global latest_jpeg, latest_frame_seq, latest_publish_mono, last_frame_time, expected_next_frame_id
+    global last_transit_ms, jitter_ms
+
+    arrival_mono = time.monotonic()
+    with metrics_lock:
+        client_metrics["packets_received"] += 1
+        client_metrics["bytes_received"] += len(packet)
+
+    t = hot_timers.start()
+    try:
+        header, payload = parse_packet(packet)
+    except ValueError as e:
+        print("[WEB CLIENT] Greška paketa:", e)
+        return
+    finally:
+        hot_timers.stop("parse", t)
+
+    # Jitter po RFC 3550: J += (|D| - J) / 16, D = razlika tranzitnih vremena susjednih paketa
+    ts = header.get("timestamp_ms", 0) or 0
+    if ts:
+        transit = arrival_mono * 1000.0 - ts
+        if last_transit_ms is not None:
+            jitter_ms += (abs(transit - last_transit_ms) - jitter_ms) / 16.0
+        last_transit_ms = transit
+
+    t = hot_timers.start()
+    fid = header["frame_id"]
+    frag_id = header["fragment_id"]
+    total = header["total_fragments"]
+
+    # Restart udp_server-a (npr. iz run_all supervisora): stari frame-ovi i procjena gubitaka ne važe
+    if expected_next_frame_id is not None and fid < expected_next_frame_id - SENDER_RESTART_GAP:
+        frames_buffer.clear()
+        frame_first_arrival.clear()
+        expected_next_frame_id = None
+        with metrics_lock:
+            client_metrics["sender_restarts"] += 1
+        print(f"[WEB CLIENT] frame_id je pao na {fid}, sender je restartovan (reset sklapanja)")
+
+    now_ms = int(time.time() * 1000)
+    # purge nepotpunih frame-ova da se buffer ne gomila (npr. > 300ms)
+    stale_before = now_ms - 300
+    for old_fid in list(frames_buffer.keys()):
+    # Heuristika: ako je fid "previše iza" očekivanog, odbaci
+        if expected_next_frame_id is not None and old_fid < expected_next_frame_id - 5:
+            del frames_buffer[old_fid]
+            frame_first_arrival.pop(old_fid, None)
+
+
+    # Procjena izgubljenih frame-ova
+    if expected_next_frame_id is None:
+        expected_next_frame_id = fid
+    else:
+        if fid > expected_next_frame_id:
+            lost = fid - expected_next_frame_id
+            with metrics_lock:
+                client_metrics["frames_lost_estimated"] += lost
+            expected_next_frame_id = fid
+
+    # Buffer fragmenta
+    if fid not in frames_buffer:
+        frames_buffer[fid] = {}
+        frame_first_arrival[fid] = arrival_mono
+    frames_buffer[fid][frag_id] = payload
+    hot_timers.stop("reassembly", t)
+
+    # Ako smo dobili sve fragmente
+    if len(frames_buffer[fid]) == total:
+        t = hot_timers.start()
+        full = b"".join(frames_buffer[fid][i] for i in range(total))
+        del frames_buffer[fid]
+
+        latest_jpeg = full
+        latest_frame_seq += 1
+        latest_publish_mono = time.monotonic()
+        hot_timers.stop("join_publish", t)
+        reassembly_ms = (latest_publish_mono - frame_first_arrival.pop(fid, arrival_mono)) * 1000.0
+
+        with metrics_lock:
+            client_metrics["frames_decoded"] += 1
+            client_metrics["last_frame_id"] = fid
+            client_metrics["stage_reassembly_ms"] = round(reassembly_ms, 2)
+            client_metrics["jitter_ms"] = round(jitter_ms, 2)
+            # Hladni start se mjeri do prvog sklopljenog frame-a (ne čeka da se otvori /video)
+            first_frame = client_metrics["frames_decoded"] == 1
+            if first_frame:
+                client_metrics["time_to_first_frame_ms"] = int((time.time() - startup_ts) * 1000)
+        if first_frame:
+            notify_supervisor("web_client", "first_frame", frame_id=fid)
+
+        # FPS + delay na strani klijenta
+        if last_frame_time is not None:
+            dt = time.time() - last_frame_time
+            if dt > 0:
+                fps = 1.0 / dt
+                fps_samples.append(fps)
+                fps_samples[:] = fps_samples[-60:]
+
+                with metrics_lock:
+                    client_metrics["last_fps"] = fps
+                    client_metrics["avg_fps"] = sum(fps_samples) / len(fps_samples)
+
+        last_frame_time = time.time()
+
+        # delay: trenutni time - header timestamp (ako postoji), korigovano za razliku satova
+        if ts:
+            raw = max(0, now_ms - int(ts))
+            d = max(0, int(now_ms - clock_sync.to_local_ms(ts)))
+            delay_samples.append(d)
+            delay_samples[:] = delay_samples[-60:]
+            with metrics_lock:
+                client_metrics["raw_delay_ms"] = int(raw)
+                client_metrics["one_way_delay_ms"] = int(d)
+                client_metrics["last_delay_ms"] = int(d)
+                client_metrics["avg_delay_ms"] = int(sum(delay_samples) / len(delay_samples))
+
+
+def record_frame_displayed(seq: int) -> None:
+    #Poziva se kada je frame prvi put poslan gledaocu (/video); mjeri fazu objava -> prikaz.
+    global displayed_seq
+    if seq == displayed_seq or seq != latest_frame_seq:
+        return
+    displayed_seq = seq
+    display_ms = (time.monotonic() - latest_publish_mono) * 1000.0
+    with metrics_lock:
+        client_metrics["stage_display_ms"] = round(display_ms, 2)
+
+
+def udp_video_receiver_loop(cfg: WebClientConfig, stop_event: threading.Event):
+    #Primanje video paketa; obrada svakog paketa je u handle_video_packet
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
     try:
-        sock.bind((cfg.listen_ip, cfg.listen_port))
-    except OSError as e:
+        _bind_receiver_socket(sock, cfg, cfg.listen_port)
+    except (OSError, ValueError) as e:
         print(f"[WEB CLIENT] Ne mogu bindati video socket na {cfg.listen_ip}:{cfg.listen_port} -> {e}")
+        sock.close()
         return
 
     sock.settimeout(1.0)
     print(f"[WEB CLIENT] Slušam VIDEO UDP na {cfg.listen_ip}:{cfg.listen_port}")
+    notify_supervisor("web_client", "ready", listen_port=cfg.listen_port)
+    if cfg.multicast_group:
+        print(f"[WEB CLIENT] Multicast grupa {cfg.multicast_group} (interfejs {cfg.multicast_interface})")
 
     try:
         while not stop_event.is_set():
             try:
                 packet, _addr = sock.recvfrom(65535)
             except socket.timeout:
+                # Nema paketa: ostatak snimka ide na disk
+                if packet_capture is not None:
+                    packet_capture.flush()
                 continue
             except OSError:
                 break
 
-            with metrics_lock:
-                client_metrics["packets_received"] += 1
-                client_metrics["bytes_received"] += len(packet)
+            # Snimanje sirovog paketa (samo ako je pokrenuto sa --capture)
+            capture = packet_capture
+            if capture is not None:
+                capture.write(packet)
 
-            try:
-                header, payload = parse_packet(packet)
-            except ValueError as e:
-                print("[WEB CLIENT] Greška paketa:", e)
-                continue
-
-            fid = header["frame_id"]
-            frag_id = header["fragment_id"]
-            total = header["total_fragments"]
-
-            now_ms = int(time.time() * 1000)
-            # purge nepotpunih frame-ova da se buffer ne gomila (npr. > 300ms)
-            stale_before = now_ms - 300
-            for old_fid in list(frames_buffer.keys()):
-            # Heuristika: ako je fid "previše iza" očekivanog, odbaci
-                if expected_next_frame_id is not None and old_fid < expected_next_frame_id - 5:
-                    del frames_buffer[old_fid]
-
-
-            # Procjena izgubljenih frame-ova
-            if expected_next_frame_id is None:
-                expected_next_frame_id = fid
-            else:
-                if fid > expected_next_frame_id:
-                    lost = fid - expected_next_frame_id
-                    with metrics_lock:
-                        client_metrics["frames_lost_estimated"] += lost
-                    expected_next_frame_id = fid
-
-            # Buffer fragmenta
-            if fid not in frames_buffer:
-                frames_buffer[fid] = {}
-            frames_buffer[fid][frag_id] = payload
-
-            # Ako smo dobili sve fragmente
-            if len(frames_buffer[fid]) == total:
-                full = b"".join(frames_buffer[fid][i] for i in range(total))
-                del frames_buffer[fid]
-
-                latest_jpeg = full
-
-                with metrics_lock:
-                    client_metrics["frames_decoded"] += 1
-                    client_metrics["last_frame_id"] = fid
-
-                # FPS + delay na strani klijenta
-                if last_frame_time is not None:
-                    dt = time.time() - last_frame_time
-                    if dt > 0:
-                        fps = 1.0 / dt
-                        fps_samples.append(fps)
-                        fps_samples[:] = fps_samples[-60:]
-
-                        with metrics_lock:
-                            client_metrics["last_fps"] = fps
-                            client_metrics["avg_fps"] = sum(fps_samples) / len(fps_samples)
-
-                last_frame_time = time.time()
-
-                # delay: trenutni time - header timestamp (ako postoji)
-                ts = header.get("timestamp_ms", 0) or 0
-                if ts:
-                    d = max(0, now_ms - int(ts))
-                    delay_samples.append(d)
-                    delay_samples[:] = delay_samples[-60:]
-                    with metrics_lock:
-                        client_metrics["last_delay_ms"] = int(d)
-                        client_metrics["avg_delay_ms"] = int(sum(delay_samples) / len(delay_samples))
+            handle_video_packet(packet)
 
     finally:
         try:
@@ -207,21 +373,48 @@ def udp_video_receiver_loop(cfg: WebClientConfig, stop_event: threading.Event):
 
 def udp_metrics_receiver_loop(cfg: WebClientConfig, stop_event: threading.Event):
     """Prima SERVER metrike preko UDP-a."""
+    global server_ip
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     try:
-        sock.bind((cfg.listen_ip, cfg.metrics_listen_port))
-    except OSError as e:
+        _bind_receiver_socket(sock, cfg, cfg.metrics_listen_port)
+    except (OSError, ValueError) as e:
         print(f"[WEB CLIENT] Ne mogu bindati metrics socket na {cfg.listen_ip}:{cfg.metrics_listen_port} -> {e}")
+        sock.close()
         return
 
-    sock.settimeout(1.0)
+    sock.setblocking(False)
     print(f"[WEB CLIENT] Slušam SERVER METRIKE UDP na {cfg.listen_ip}:{cfg.metrics_listen_port}")
 
+    # Ping ide nazad na adresu sa koje stižu metrike (socket udp_server-a ili relay-a).
+    # Poseban socket (ne dijeljeni metrics port), da pong stigne baš ovoj instanci web_client-a.
+    ping_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    ping_sock.bind(("0.0.0.0", 0))
+    ping_sock.setblocking(False)
+    ping_addr = None
+    last_ping = 0.0
+
     try:
         while not stop_event.is_set():
+            now = time.monotonic()
+            if ping_addr is not None and now - last_ping >= PING_INTERVAL_S:
+                last_ping = now
+                try:
+                    ping_sock.sendto(clock_sync.make_ping(), ping_addr)
+                except OSError:
+                    pass
+
             try:
-                data, _addr = sock.recvfrom(4096)
-            except socket.timeout:
+                ready, _, _ = select.select([sock, ping_sock], [], [], 1.0)
+            except (OSError, ValueError):
+                break
+            if not ready:
+                continue
+            # Pong ima prednost (t4 treba biti što bliže trenutku prijema)
+            src = ping_sock if ping_sock in ready else sock
+            try:
+                data, addr = src.recvfrom(4096)
+            except (BlockingIOError, ConnectionResetError):
+                # Windows: ICMP "port unreachable" nakon pinga ugašenom serveru
                 continue
             except OSError:
                 break
@@ -230,15 +423,29 @@ def udp_metrics_receiver_loop(cfg: WebClientConfig, stop_event: threading.Event)
                 m = json.loads(data.decode("utf-8", errors="ignore"))
             except Exception:
                 continue
+            if not isinstance(m, dict):
+                continue
+
+            if m.get("type") == "pong":
+                if clock_sync.handle_pong(m):
+                    with metrics_lock:
+                        client_metrics["rtt_ms"] = round(clock_sync.rtt_ms, 2)
+                        client_metrics["clock_offset_ms"] = round(clock_sync.offset_ms, 2)
+                continue
+            if src is ping_sock:
+                continue
 
+            ping_addr = addr
             with metrics_lock:
                 server_metrics.update(m)
+                server_ip = addr[0]
 
     finally:
-        try:
-            sock.close()
-        except Exception:
-            pass
+        for s in (sock, ping_sock):
+            try:
+                s.close()
+            except Exception:
+                pass
         print("[WEB CLIENT] METRIKE receiver zaustavljen.")
 
 
@@ -249,9 +456,10 @@ def gen_mjpeg():
         if latest_jpeg is None:
             time.sleep(0.005)
             continue
-        frame = latest_jpeg
+        seq, frame = latest_frame_seq, latest_jpeg
         yield (b"--frame\r\n"
                b"Content-Type: image/jpeg\r\n\r\n" + frame + b"\r\n")
+        record_frame_displayed(seq)
         time.sleep(0.005)
 
 
@@ -265,17 +473,82 @@ def video_feed():
     return Response(gen_mjpeg(), mimetype="multipart/x-mixed-replace; boundary=frame")
 
 
-@app.route("/metrics")
-def metrics():
+def current_frame():
+    #(seq, jpeg) zadnjeg kompletnog frame-a; koristi ga i async server (asgi_app.py)
+    return latest_frame_seq, latest_jpeg
+
+
+def metrics_snapshot() -> Dict[str, Any]:
     with metrics_lock:
         m_client = dict(client_metrics)
         m_server = dict(server_metrics)
-    return jsonify({"client": m_client, "server": m_server})
+    # Sender -> prikaz: encode (server) + one-way (packetize, mreža, sklapanje) + objava -> prikaz
+    m_client["sender_to_display_ms"] = round(
+        float(m_server.get("stage_encode_ms", 0) or 0)
+        + float(m_client.get("one_way_delay_ms", 0) or 0)
+        + float(m_client.get("stage_display_ms", 0) or 0), 2)
+    return {"client": m_client, "server": m_server}
+
+
+@app.route("/metrics")
+def metrics():
+    return jsonify(metrics_snapshot())
+
+
+@app.route("/debug/timers", methods=["GET"])
+def debug_timers():
+    #Tajmeri vrućih putanja: klijent (ovaj proces) + server (stižu uz server metrike)
+    with metrics_lock:
+        server_timers = server_metrics.get("server_timers")
+    return jsonify({"client": hot_timers.snapshot(), "server": server_timers})
+
+
+@app.route("/debug/timers/<action>", methods=["POST"])
+def debug_timers_action(action: str):
+    #on/off važi i za udp_server (kontrolni kanal), isto kao dugmad na /settings
+    server_notified = False
+    if action in ("on", "off"):
+        server_notified = set_hot_timers(action == "on")
+    elif action == "reset":
+        hot_timers.reset()
+    else:
+        return jsonify({"ok": False, "error": "Nepoznata akcija (on/off/reset)"}), 400
+    return jsonify({"ok": True, "server_notified": server_notified, "timers": hot_timers.snapshot()})
+
+
+@app.route("/debug/profile")
+def debug_profile():
+    #Sampling profil procesa u collapsed stacks formatu (?seconds=N, maks 60)
+    from flask import request
+    try:
+        seconds = float(request.args.get("seconds", 5))
+    except ValueError:
+        seconds = 5.0
+    seconds = max(0.1, min(60.0, seconds))
+    text = sample_profile(seconds)
+    return Response(text, mimetype="text/plain")
+
+
+def load_app_config() -> Dict[str, Any]:
+    #config.json ovog procesa (--config), sa web_client override-ima iz komandne linije.
+    cfg = load_config(app.config["CONFIG_PATH"])
+    cfg["web_client"] = {**cfg.get("web_client", {}), **app.config["WEB_CLIENT_OVERRIDES"]}
+    return cfg
+
+
+def send_server_control(msg: Dict[str, Any]) -> bool:
+    #Slanje kontrolne poruke udp_server-u (IP iz config-a ili izvor server metrika)
+    cfg = load_app_config()
+    host = cfg.get("web_client", {}).get("server_control_ip") or server_ip
+    port = int(cfg.get("udp_server", {}).get("control_port", 7900))
+    if not host or port <= 0:
+        return False
+    return send_control(host, port, msg)
 
 
 @app.route("/health")
 def health():
-    cfg = load_config().get("web_client", {})
+    cfg = load_app_config().get("web_client", {})
     return jsonify({
         "ok": True,
         "receivers_running": receiver_manager.is_running(),
@@ -292,6 +565,10 @@ def shutdown():
     except Exception:
         pass
 
+    # Upis preostalih snimljenih paketa prije gašenja
+    if packet_capture is not None:
+        packet_capture.close()
+
     # Pokušaj za shutdown
     func = None
     try:
@@ -313,9 +590,42 @@ app.register_blueprint(ui_bp)
 
 receiver_manager = ReceiverManager()
 app.config["RECEIVER_MANAGER"] = receiver_manager
+app.config["SERVER_CONTROL"] = send_server_control
+# Putanja do config.json i web_client vrijednosti iz komandne linije (imaju prednost nad fajlom)
+app.config["CONFIG_PATH"] = "config.json"
+app.config["WEB_CLIENT_OVERRIDES"] = {}
+app.config["LOAD_CONFIG"] = load_app_config
+
+def _raise_interrupt(_signum, _frame) -> None:
+    raise KeyboardInterrupt
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="UDP video web client (UDP receiver + Flask UI).")
+    p.add_argument("--config", default="config.json", help="Putanja do config.json")
+    p.add_argument("--listen-port", type=int, default=None, help="UDP port za video (override config)")
+    p.add_argument("--metrics-listen-port", type=int, default=None, help="UDP port za server metrike (override config)")
+    p.add_argument("--web-port", type=int, default=None, help="Port web UI-ja (override config)")
+    p.add_argument("--capture", default=None, help="Snimi sirove video pakete u binarni log (za replay.py)")
+    p.add_argument("--async", dest="async_http", action="store_true",
+                   help="Async HTTP server (ASGI/uvicorn) za /video i /metrics umjesto Werkzeug dev servera")
+    return p.parse_args()
 
 if __name__ == "__main__":
-    cfg = load_config()
+    args = parse_args()
+    if args.capture:
+        packet_capture = PacketCaptureWriter(args.capture)
+        print(f"[WEB CLIENT] Snimam pakete u {args.capture}")
+        # run_all/supervisor gasi procese SIGTERM-om; kao Ctrl+C, da finally zatvori snimak
+        signal.signal(signal.SIGTERM, _raise_interrupt)
+
+    # Override-i važe i za kasnije snimanje postavki / restart receiver-a iz UI-ja
+    app.config["CONFIG_PATH"] = args.config
+    overrides = {"listen_port": args.listen_port, "metrics_listen_port": args.metrics_listen_port,
+                 "web_port": args.web_port}
+    app.config["WEB_CLIENT_OVERRIDES"] = {k: v for k, v in overrides.items() if v is not None}
+
+    cfg = load_app_config()
     wc = cfg.get("web_client", {})
 
     # Konfiguriši pri pokretanju
@@ -329,4 +639,13 @@ if __name__ == "__main__":
     host = str(wc.get("web_host", "0.0.0.0"))
     port = int(wc.get("web_port", 8000))
     print(f"[WEB CLIENT] Web UI: http://{host}:{port} (ako je host 0.0.0.0, otvori sa IP adrese računara)")
-    app.run(host=host, port=port, debug=False, threaded=True)
+    try:
+        if args.async_http or bool(wc.get("async_http", False)):
+            from asgi_app import create_asgi_app, run_asgi
+            print("[WEB CLIENT] Async HTTP mod (ASGI)")
+            run_asgi(create_asgi_app(app, current_frame, metrics_snapshot, record_frame_displayed), host, port)
+        else:
+            app.run(host=host, port=port, debug=False, threaded=True)
+    finally:
+        if packet_capture is not None:
+            packet_capture.close()